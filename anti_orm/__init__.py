@@ -1,8 +1,16 @@
-from .runtime import TransactionPool, Cache
+from .runtime import TransactionPool, Cache, RetryableError
 from .transaction import Transaction
-from .data import DataSource, DataScope
+from .tracing import Tracer, TimingTracer, HistogramTracer
+from .data import DataSource, DataScope, Prefetch
+from .sharding import ShardedScope
+from .memory import MemoryScope, WriteConflict
 from .storage import (
-	Storage, VoidStorage, WeakStorage,
-	DoubleSideMap, DoubleSideCollectionMap
+	Storage, VoidStorage, WeakStorage, Bindable,
+	DoubleSideMap, DoubleSideCollectionMap, CompositeKey,
+	DoubleSideOrderedMap, DoubleSideOrderedCollectionMap, Ordered
+)
+from .storage_compact import (
+	CompactStorage, CompactVoidStorage, CompactWeakStorage,
+	CompactDoubleSideMap
 )
 from .storage_transaction import Cloneable
\ No newline at end of file
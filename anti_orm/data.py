@@ -1,31 +1,71 @@
-from .transaction import Transaction
+from asyncio import gather
+from operator import attrgetter
+from .transaction import Transaction, require_sync
 from .storage import Storage
 from .storage_transaction import StorageTransaction
 from .storage_lock import StorageLock, StorageLockClient
+from .tracing import NO_TRACER
 
 class DataSource:
 
-	def __init__(self, transaction, storage, lock):
+	tracer = NO_TRACER
+	scope = None
+
+	def __init__(self, transaction, storage, lock, *deps):
 		self.transaction = transaction
 		transaction.add_source(self)
 
 		self.storage = storage
 		storage.restore = self.restore_cached
+		storage.restore_sync = self.restore_cached_sync
+		if self.batched():
+			storage.restore_batch = self.restore_batch
 
 		self.lock = lock
+		self.deps = deps
+
+	def bind(self, scope):
+		self.scope = scope
+		if self.batched():
+			self.storage.restore_batch = self.restore_batch
+
+	def batched(self):
+		return bool(self.scope and self.scope.prefetch) \
+			or type(self).restore_cached_batch \
+				is not DataSource.restore_cached_batch
+
+	def trace(self, tracer):
+		self.tracer = tracer
+		if tracer is not NO_TRACER:
+			self.storage.restore = self.restore_traced
+
+	def ensure_sync(self):
+		for method in ('flush', 'release', 'restore_cached'):
+			if getattr(type(self), f'{method}_sync') \
+				is getattr(DataSource, f'{method}_sync'):
+				require_sync(self, DataSource, method)
 
 	async def flush(self):
 		pass
 
+	def flush_sync(self):
+		require_sync(self, DataSource, 'flush')
+
 	async def release(self):
 		pass
 
+	def release_sync(self):
+		require_sync(self, DataSource, 'release')
+
 	def identify(self, obj):
 		return self.storage.id.key_of(obj)
 
 	async def restore(self, obj):
 		return await self.storage(obj)
 
+	def restore_sync(self, obj):
+		return self.storage.get_sync(obj)
+
 	async def writable(self, obj):
 		await self.lock(obj).acquire()
 		return self.storage.take_writable(await self.restore(obj))
@@ -33,10 +73,56 @@ class DataSource:
 	async def restore_cached(self, obj):
 		pass
 
+	def restore_cached_sync(self, obj):
+		require_sync(self, DataSource, 'restore_cached')
+
+	async def restore_traced(self, obj):
+		with self.tracer.span('restore_cached', self.scope):
+			await self.restore_cached(obj)
+
+	async def restore_batch(self, objs):
+		await self.restore_cached_batch(objs)
+		await self.prefetch(objs)
+
+	async def restore_cached_batch(self, objs):
+		if len(objs) == 1:
+			await self.storage.restore(objs[0])
+		else:
+			await gather(*(self.storage.restore(obj) for obj in objs))
+
+	async def prefetch(self, objs):
+		if not self.scope or not self.scope.prefetch:
+			return
+
+		sources = dict(zip(self.scope.deps, self.deps))
+		batches = {}
+		for spec in self.scope.prefetch:
+			batches.setdefault(spec.scope, []).extend(
+				sources[spec.scope].storage[spec.map].load(spec.keys(objs))
+			)
+		with self.tracer.span('prefetch', self.scope):
+			await gather(*(
+				sources[scope].storage.restore_all(values)
+					for scope, values in batches.items()
+			))
+
+class Prefetch:
+
+	def __init__(self, scope, key, map = 'id'):
+		self.scope = scope
+		self.key = key if callable(key) else attrgetter(key)
+		self.map = map
+
+	def keys(self, objs):
+		return [*dict.fromkeys(
+			key for key in (self.key(obj) for obj in objs) if key is not None
+		)]
+
 class DataScope:
 
 	transaction_id = object()
 	deps = ()
+	prefetch = ()
 
 	def __init__(self):
 		self.storage_lock_val = None
@@ -50,9 +136,16 @@ class DataScope:
 			self.storage_lock_val = StorageLock(self.storage)
 		return self.storage_lock_val
 
+	def storages(self):
+		return (self.storage,)
+
 	async def create_transaction(self):
 		return Transaction()
 
+	def create_transaction_sync(self):
+		require_sync(self, DataScope, 'create_transaction')
+		return Transaction()
+
 	def create_storage(self):
 		return StorageTransaction(self.storage)
 
@@ -63,4 +156,7 @@ class DataScope:
 		return DataSource(*args)
 
 	def lock(self, obj):
-		return self.storage_lock(obj)
\ No newline at end of file
+		return self.storage_lock(obj)
+
+	def retryable(self, err):
+		return False
\ No newline at end of file
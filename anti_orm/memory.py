@@ -0,0 +1,200 @@
+from collections import deque
+from .runtime import RetryableError
+from .data import DataScope
+from .storage import Storage, DoubleSideCollectionMap
+from .storage_transaction import StorageTransaction, IdentityMapTransaction
+
+MISSING = object()
+
+class WriteConflict(RetryableError):
+	pass
+
+class Versions:
+
+	def __init__(self, storage):
+		self.storage = storage
+		self.version = 0
+		self.collected = 0
+		self.snapshots = {}
+		self.logs = {}
+
+	def log(self, map_name):
+		if map_name not in self.logs:
+			self.logs[map_name] = VersionLog(self.storage[map_name])
+		return self.logs[map_name]
+
+	def open(self):
+		self.snapshots[self.version] = self.snapshots.get(self.version, 0) + 1
+		return self.version
+
+	def close(self, snapshot):
+		self.snapshots[snapshot] -= 1
+		if not self.snapshots[snapshot]:
+			del self.snapshots[snapshot]
+		self.collect()
+
+	def commit(self):
+		self.version += 1
+		return self.version
+
+	def oldest(self):
+		return min(self.snapshots, default = self.version)
+
+	def collect(self):
+		oldest = self.oldest()
+		if oldest <= self.collected:
+			return
+		self.collected = oldest
+		for log in self.logs.values():
+			log.collect(oldest)
+
+	def stats(self, deep = False):
+		return {
+			'version': self.version,
+			'snapshots': sum(self.snapshots.values()),
+			'oldest': self.oldest(),
+			'maps': {name: log.stats() for name, log in self.logs.items()}
+		}
+
+class VersionLog:
+
+	def __init__(self, mapping):
+		self.map = mapping
+		self.chains = {}
+		self.mains = {}
+		self.expiry = deque()
+		self.collection = isinstance(mapping.data, DoubleSideCollectionMap)
+
+	def current(self, key):
+		return self.map[key] if key in self.map else MISSING
+
+	def get(self, key, snapshot):
+		chain = self.chains.get(key)
+		if not chain or chain[-1][0] <= snapshot:
+			return self.current(key)
+		for version, value in reversed(chain):
+			if version <= snapshot:
+				return value
+		return MISSING
+
+	def latest(self, key):
+		chain = self.chains.get(key)
+		return chain[-1][0] if chain else 0
+
+	def subkeys(self, main_key):
+		return self.mains.get(main_key, ())
+
+	def record(self, key, previous, version):
+		if key not in self.chains:
+			self.chains[key] = [(0, previous)]
+			self.mains.setdefault(self.main_key(key), set()).add(key)
+		self.chains[key].append((version, self.current(key)))
+		self.expiry.append((version, key))
+
+	def main_key(self, key):
+		return key[0] if self.collection else key
+
+	def collect(self, oldest):
+		while self.expiry and self.expiry[0][0] <= oldest:
+			_, key = self.expiry.popleft()
+			chain = self.chains.get(key)
+			if not chain:
+				continue
+			while len(chain) > 1 and chain[1][0] <= oldest:
+				del chain[0]
+			if len(chain) == 1:
+				del self.chains[key]
+				keys = self.mains[self.main_key(key)]
+				keys.discard(key)
+				if not keys:
+					del self.mains[self.main_key(key)]
+
+	def stats(self):
+		return {
+			'chains': len(self.chains),
+			'expiring': len(self.expiry),
+			'versions': sum(len(chain) for chain in self.chains.values())
+		}
+
+class SnapshotStorageTransaction(StorageTransaction):
+
+	def __init__(self, storage, versions):
+		self.versions = versions
+		self.snapshot = versions.open()
+		super().__init__(storage)
+
+	def map_transaction(self, name, mapping):
+		return SnapshotMapTransaction(
+			mapping, self.versions.log(name), self.versions, self.snapshot
+		)
+
+	def stats(self, deep = False):
+		return {**super().stats(deep), 'snapshot': self.snapshot}
+
+	def flush(self):
+		if not any([mapping.validate() for mapping in self.maps.values()]):
+			return
+		self.versions.commit()
+		super().flush()
+		self.versions.collect()
+
+	def finish(self):
+		super().finish()
+		if self.snapshot is not None:
+			self.versions.close(self.snapshot)
+			self.snapshot = None
+
+class SnapshotMapTransaction(IdentityMapTransaction):
+
+	def __init__(self, identity_map, log, versions, snapshot):
+		super().__init__(identity_map)
+		self.log = log
+		self.versions = versions
+		self.snapshot = snapshot
+
+	def subkeys(self, main_key):
+		return [
+			subkey for subkey in dict.fromkeys([
+				*self.global_map.subkeys(main_key), *self.log.subkeys(main_key)
+			]) if self.exists(subkey)
+		]
+
+	def known_keys(self):
+		yield from super().known_keys()
+		yield from [
+			key for key in self.log.chains
+				if key not in self.global_map and self.exists(key)
+		]
+
+	def exists(self, key):
+		return self.log.get(key, self.snapshot) is not MISSING
+
+	def peek(self, key):
+		value = self.log.get(key, self.snapshot)
+		return None if value is MISSING else value
+
+	def validate(self):
+		pending = [key for key in self.updated if key in self.taken]
+		for key in pending:
+			if self.log.latest(key) > self.snapshot:
+				raise WriteConflict(
+					f'{key!r} was changed by a concurrent transaction'
+				)
+		return pending
+
+	def push(self, key):
+		previous = self.log.current(key)
+		super().push(key)
+		self.log.record(key, previous, self.versions.version)
+
+class MemoryScope(DataScope):
+
+	def __init__(self):
+		if not hasattr(self, 'storage'):
+			self.storage = Storage()
+		super().__init__()
+		self.storage.make_mapping(id = True)
+		self.versions = Versions(self.storage)
+
+	def create_storage(self):
+		return SnapshotStorageTransaction(self.storage, self.versions)
@@ -1,70 +1,218 @@
-from asyncio import gather
+from asyncio import gather, sleep, wait_for, Event, TimeoutError
+from random import uniform
 from .transaction import BaseTransaction
 from .storage import Storage
+from .tracing import NO_TRACER
+
+class RetryableError(Exception):
+	pass
 
 class TransactionPool(BaseTransaction):
 
-	def __init__(self, *scopes, write = set(), cache = None):
+	in_flight = set()
+
+	def __init__(self, *scopes, write = set(), cache = None, tracer = None):
 		super().__init__()
+		self.scopes = scopes
 		self.transactions = {}
 		self.cache = cache or OneTimeCache()
+		self.tracer = tracer or NO_TRACER
 		self.lock_clients = {scope: scope.create_lock() for scope in scopes}
 		self.sources = {scope: None for scope in scopes}
 		self.to_write = {*write}
+		self.finished = None
 
 	async def __aenter__(self):
-		self.cache.reload()
-		global_storages = {scope.storage: scope for scope in self.sources}
-		await gather(*(
-			self.prepare_obj(obj, global_storages)
-				for obj in self.to_write
-		))
-
-		result = []
-		for scope in [*self.sources]:
-			result.append(await self.create_source(scope))
-		return result
+		with self.tracer.span('enter'):
+			self.reset()
+			self.finished = Event()
+			try:
+				self.in_flight.add(self)
+				self.cache.reload()
+				global_storages = {
+					storage: scope
+						for scope in self.sources for storage in scope.storages()
+				}
+				await gather(*(
+					self.prepare_obj(obj, global_storages)
+						for obj in self.to_write
+				))
+
+				result = []
+				for scope in [*self.sources]:
+					result.append(await self.create_source(scope))
+				return result
+			except BaseException:
+				self.finish()
+				raise
 
 	async def __aexit__(self, err_type, *_):
-		try:
-			if err_type:
-				await self.rollback()
-			else:
-				await self.commit()
-				self.cache.flush()
+		with self.tracer.span('exit'):
+			try:
+				if err_type:
+					await self.rollback()
+					self.cache.discard()
+				else:
+					try:
+						await self.commit()
+						with self.tracer.span('cache_flush'):
+							self.cache.flush()
+					except BaseException:
+						self.cache.discard()
+						raise
+
+			finally:
+				self.finish()
+
+	async def run(self, fn, retries = 3, backoff = 0.01, max_backoff = 1):
+		attempt = 0
+		while True:
+			try:
+				async with self as sources:
+					return await fn(*sources)
+			except Exception as err:
+				if attempt >= retries or not self.retryable(err):
+					raise
+			attempt += 1
+			with self.tracer.span('retry'):
+				await self.wait_conflicts(max_backoff)
+				await sleep(uniform(0, min(max_backoff, backoff * 2 ** (attempt - 1))))
+
+	def retryable(self, err):
+		return isinstance(err, (RetryableError, TimeoutError)) \
+			or any(scope.retryable(err) for scope in self.sources)
+
+	def conflicts(self):
+		return [
+			pool for pool in self.in_flight
+				if pool is not self and pool.to_write & self.to_write
+		]
+
+	async def wait_conflicts(self, timeout):
+		conflicts = self.conflicts()
+		if conflicts:
+			try:
+				await wait_for(gather(*(
+					pool.finished.wait() for pool in conflicts
+				)), timeout)
+			except TimeoutError:
+				pass
+
+	def reset(self):
+		self.transactions = {}
+		self.sources = {scope: None for scope in self.scopes}
+
+	def finish(self):
+		for lock in self.lock_clients.values():
+			lock.release_all()
+		self.in_flight.discard(self)
+		if self.finished:
+			self.finished.set()
+
+	def __enter__(self):
+		with self.tracer.span('enter'):
+			self.reset()
+			self.cache.reload()
+			global_storages = {
+				storage: scope
+					for scope in self.sources for storage in scope.storages()
+			}
+			try:
+				for obj in self.to_write:
+					self.prepare_obj_sync(obj, global_storages)
+				return [
+					self.create_source_sync(scope) for scope in [*self.sources]
+				]
+			except BaseException:
+				self.finish()
+				raise
+
+	def __exit__(self, err_type, *_):
+		with self.tracer.span('exit'):
+			try:
+				if err_type:
+					self.rollback_sync()
+					self.cache.discard()
+				else:
+					try:
+						self.commit_sync()
+						with self.tracer.span('cache_flush'):
+							self.cache.flush()
+					except BaseException:
+						self.cache.discard()
+						raise
 
-		finally:
-			for lock in self.lock_clients.values():
-				lock.release_all()
+			finally:
+				self.finish()
 
 	async def create_source(self, scope):
 		for dep in scope.deps:
 			await self.create_source(dep)
 
 		if scope.transaction_id not in self.transactions:
-			self.transactions[scope.transaction_id] = \
-				await scope.create_transaction()
+			with self.tracer.span('create_transaction', scope):
+				transaction = await scope.create_transaction()
+			self.add_transaction(scope, transaction)
+		return self.bind_source(scope)
 
+	def create_source_sync(self, scope):
+		for dep in scope.deps:
+			self.create_source_sync(dep)
+
+		if scope.transaction_id not in self.transactions:
+			with self.tracer.span('create_transaction', scope):
+				transaction = scope.create_transaction_sync()
+			self.add_transaction(scope, transaction)
+		return self.bind_source(scope, sync = True)
+
+	def add_transaction(self, scope, transaction):
+		transaction.trace(self.tracer, scope)
+		self.transactions[scope.transaction_id] = transaction
+
+	def bind_source(self, scope, sync = False):
 		if scope not in self.sources or not self.sources[scope]:
-			self.sources[scope] = scope.create_source(
+			source = scope.create_source(
 				self.transactions[scope.transaction_id],
 				self.cache.storage(scope),
 				self.lock_clients.get(scope) or scope.create_lock(),
 				*(self.sources[dep] for dep in scope.deps)
 			)
+			if sync:
+				source.transaction.ensure_sync()
+				source.ensure_sync()
+			source.bind(scope)
+			source.trace(self.tracer)
+			self.sources[scope] = source
 		return self.sources[scope]
 
 	async def prepare_obj(self, obj, global_storages):
 		scope = global_storages[Storage.of(obj)]
-		await self.lock_clients[scope](obj).acquire()
-		self.cache.storage(scope).take_writable(obj)
+		with self.tracer.span('lock', scope):
+			await self.lock_clients[scope](obj).acquire()
+		with self.tracer.span('prepare', scope):
+			self.cache.storage(scope).take_writable(obj)
+
+	def prepare_obj_sync(self, obj, global_storages):
+		scope = global_storages[Storage.of(obj)]
+		with self.tracer.span('lock', scope):
+			self.lock_clients[scope](obj).acquire_sync()
+		with self.tracer.span('prepare', scope):
+			self.cache.storage(scope).take_writable(obj)
 
 	async def commit(self):
 		await gather(*(trx.commit() for trx in self.transactions.values()))
 
+	def commit_sync(self):
+		for trx in self.transactions.values():
+			trx.commit_sync()
+
 	async def rollback(self):
 		await gather(*(trx.rollback() for trx in self.transactions.values()))
 
+	def rollback_sync(self):
+		for trx in self.transactions.values():
+			trx.rollback_sync()
+
 class Cache:
 
 	def __init__(self):
@@ -81,10 +229,18 @@ class Cache:
 			self.storages[scope] = scope.create_storage()
 		return self.storages[scope]
 
+	def stats(self, deep = False):
+		return {
+			scope: storage.stats(deep) for scope, storage in self.storages.items()
+		}
+
 	def flush(self):
 		for storage in self.storages.values():
 			storage.flush()
 
+	def discard(self):
+		pass
+
 	def reload(self):
 		for scope, storage in self.storages.items():
 			self.storages[scope] = scope.create_storage()
@@ -100,4 +256,7 @@ class OneTimeCache(Cache):
 
 	def flush(self):
 		super().flush()
+		self.clear()
+
+	def discard(self):
 		self.clear()
\ No newline at end of file
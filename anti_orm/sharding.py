@@ -0,0 +1,340 @@
+from asyncio import gather, ensure_future
+from zlib import crc32
+from .transaction import Transaction
+from .data import DataSource, DataScope
+from .storage import Storage, DoubleSideCollectionMap
+from .storage_lock import VOID
+
+def stable_hash(key):
+	return key if isinstance(key, int) else crc32(repr(key).encode())
+
+class ShardedTransaction(Transaction):
+
+	def __init__(self):
+		super().__init__()
+		self.transactions = {}
+		self.opening = {}
+
+	async def open(self, shard):
+		if shard not in self.opening:
+			self.opening[shard] = ensure_future(self.begin(shard))
+		return await self.opening[shard]
+
+	async def begin(self, shard):
+		with self.tracer.span('create_transaction', shard):
+			transaction = await shard.create_transaction()
+		transaction.trace(self.tracer, shard)
+		self.transactions[shard] = transaction
+		return transaction
+
+	async def flush(self):
+		await super().flush()
+		await gather(*(trx.flush() for trx in self.transactions.values()))
+
+	async def do_commit(self):
+		await gather(*(trx.do_commit() for trx in self.transactions.values()))
+
+	async def do_rollback(self):
+		await gather(*(
+			trx.do_rollback() for trx in self.transactions.values()
+		))
+
+	async def release(self):
+		await super().release()
+		await gather(*(trx.release() for trx in self.transactions.values()))
+
+class ShardedSource(DataSource):
+
+	def __init__(self, transaction, storage, lock, *deps):
+		super().__init__(transaction, storage, lock, *deps)
+		self.sources = {}
+		storage.open = self.shard
+
+	async def shard(self, shard):
+		if shard not in self.sources:
+			transaction = await self.transaction.open(shard)
+			if shard not in self.sources:
+				deps = dict(zip(self.scope.deps, self.deps))
+				source = shard.create_source(
+					transaction, self.storage.shard(shard), self.lock.shard(shard),
+					*(deps[dep] for dep in shard.deps)
+				)
+				source.bind(shard)
+				source.trace(self.tracer)
+				self.sources[shard] = source
+		return self.sources[shard]
+
+	async def flush(self):
+		await gather(*(self.shard(shard) for shard in [*self.storage.storages]))
+
+class ShardedStorage:
+
+	def __init__(self, scope):
+		self.scope = scope
+		self.storages = {}
+		self.entries = {
+			name: ShardedEntry(self, name)
+				for name, _ in scope.shards[0].storage.mapping()
+		}
+		self.open = None
+
+	def __getattr__(self, map_name):
+		return self[map_name]
+
+	def __getitem__(self, map_name):
+		return self.entries[map_name]
+
+	def __contains__(self, value):
+		return value in self.storage_of(value)
+
+	def __iter__(self):
+		for storage in [*self.storages.values()]:
+			yield from storage
+
+	async def __call__(self, value):
+		source = await self.open(self.shard_for(value))
+		return await source.storage(value)
+
+	def shard(self, shard):
+		if shard not in self.storages:
+			self.storages[shard] = shard.create_storage()
+		return self.storages[shard]
+
+	def shard_for(self, value, keys = {}):
+		for shard, storage in self.storages.items():
+			if value in storage:
+				return shard
+		return self.scope.shard_of(value, keys)
+
+	def storage_of(self, value, keys = {}):
+		return self.shard(self.shard_for(value, keys))
+
+	async def opened(self, shards):
+		return await gather(*(self.open(shard) for shard in shards))
+
+	async def restore_all(self, values):
+		groups = {}
+		for position, value in enumerate(values):
+			groups.setdefault(self.shard_for(value), []).append(position)
+		sources = await self.opened(groups)
+		results = await gather(*(
+			source.storage.restore_all([values[position] for position in group])
+				for source, group in zip(sources, groups.values())
+		))
+		restored = [*values]
+		for group, group_values in zip(groups.values(), results):
+			for position, value in zip(group, group_values):
+				restored[position] = value
+		return restored
+
+	async def find(self, **criteria):
+		sources = await self.opened(self.scope.shards)
+		return [
+			value for source in sources
+				for value in source.storage.find(**criteria)
+		]
+
+	def take(self, value):
+		return self.storage_of(value).take(value)
+
+	def take_writable(self, value):
+		return self.storage_of(value).take_writable(value)
+
+	def save(self, value, **keys):
+		self.storage_of(value, keys).save(value, **keys)
+
+	def remember(self, value, **keys):
+		self.storage_of(value, keys).remember(value, **keys)
+
+	def delete(self, value):
+		self.storage_of(value).delete(value)
+
+	def release(self, value):
+		self.storage_of(value).release(value)
+
+	def tracked(self, value):
+		return self.storage_of(value).tracked(value)
+
+	def track(self, value):
+		self.storage_of(value).track(value)
+
+	def track_delete(self, value):
+		self.storage_of(value).track_delete(value)
+
+	def new(self):
+		for storage in [*self.storages.values()]:
+			yield from storage.new()
+
+	def deleted(self):
+		for storage in [*self.storages.values()]:
+			yield from storage.deleted()
+
+	def stats(self, deep = False):
+		return {'shards': {
+			self.scope.shards.index(shard): storage.stats(deep)
+				for shard, storage in self.storages.items()
+		}}
+
+	def flush(self):
+		for storage in self.storages.values():
+			storage.flush()
+
+	def finish(self):
+		for storage in self.storages.values():
+			storage.finish()
+
+class ShardedEntry:
+
+	def __init__(self, storage, name):
+		self.storage = storage
+		self.name = name
+		self.collection = isinstance(
+			storage.scope.shards[0].storage[name].data, DoubleSideCollectionMap
+		)
+
+	async def __call__(self, key):
+		sources = await self.storage.opened(self.shards_for(key))
+		return self.merge(await gather(*(
+			source.storage[self.name](key) for source in sources
+		)))
+
+	def __getitem__(self, key):
+		return self.merge([
+			self.storage.shard(shard)[self.name][key]
+				for shard in self.shards_for(key)
+		])
+
+	def load(self, keys):
+		keys = [*keys]
+		return [
+			value for shard, group in self.groups(keys).items()
+				for value in self.storage.shard(shard)[self.name].load(group)
+		]
+
+	async def many(self, keys):
+		keys = [*keys]
+		if not self.routed:
+			sources = await self.storage.opened(self.scope.shards)
+			results = await gather(*(
+				source.storage[self.name].many(keys) for source in sources
+			))
+			return [self.merge(values) for values in zip(*results)]
+
+		groups = self.groups(keys)
+		sources = await self.storage.opened(groups)
+		results = await gather(*(
+			source.storage[self.name].many(group)
+				for source, group in zip(sources, groups.values())
+		))
+		found = {
+			key: value
+				for group, values in zip(groups.values(), results)
+				for key, value in zip(group, values)
+		}
+		return [found[key] for key in keys]
+
+	@property
+	def scope(self):
+		return self.storage.scope
+
+	@property
+	def routed(self):
+		return self.name == self.scope.map
+
+	def key_of(self, value):
+		return self.storage.storage_of(value)[self.name].key_of(value)
+
+	def groups(self, keys):
+		if not self.routed:
+			return {shard: keys for shard in self.scope.shards}
+		groups = {}
+		for key in keys:
+			groups.setdefault(self.scope.route(key), []).append(key)
+		return groups
+
+	def shards_for(self, key):
+		return [self.scope.route(key)] if self.routed else self.scope.shards
+
+	def merge(self, results):
+		if self.collection:
+			return [value for values in results for value in values]
+		for value in results:
+			if value is not None:
+				return value
+
+class ShardedLockClient:
+
+	def __init__(self, scope):
+		self.scope = scope
+		self.clients = {}
+
+	def __call__(self, nkw__value = VOID, **keys):
+		shard = self.scope.shard_of(nkw__value, keys)
+		return self.shard(shard)(nkw__value, **keys)
+
+	def shard(self, shard):
+		if shard not in self.clients:
+			self.clients[shard] = shard.create_lock()
+		return self.clients[shard]
+
+	def release_all(self):
+		for client in self.clients.values():
+			client.release_all()
+
+class ShardedScope(DataScope):
+
+	def __init__(self, *shards, map = 'id', key = None):
+		self.shards = shards
+		self.map = map
+		self.key = key
+		self.deps = tuple(dict.fromkeys(
+			dep for shard in shards for dep in shard.deps
+		))
+
+	@property
+	def transaction_id(self):
+		return ('sharded', *(shard.transaction_id for shard in self.shards))
+
+	def storages(self):
+		return [storage for shard in self.shards for storage in shard.storages()]
+
+	def route(self, key):
+		return self.shards[stable_hash(key) % len(self.shards)]
+
+	def shard_of(self, value = VOID, keys = {}):
+		if value is not VOID:
+			storage = Storage.of(value)
+			for shard in self.shards:
+				if storage in shard.storages():
+					return shard
+		if self.map in keys:
+			return self.route(keys[self.map])
+
+		key = VOID if value is VOID else self.key_of(value)
+		if key is VOID or key is self.shards[0].storage[self.map].void:
+			raise ValueError(
+				f'Cannot derive a {self.map!r} key to route {value!r} to a shard'
+			)
+		return self.route(key)
+
+	def key_of(self, value):
+		return self.key(value) if self.key \
+			else self.shards[0].storage[self.map].key_of(value)
+
+	async def create_transaction(self):
+		return ShardedTransaction()
+
+	def create_storage(self):
+		return ShardedStorage(self)
+
+	def create_lock(self):
+		return ShardedLockClient(self)
+
+	def create_source(self, *args):
+		return ShardedSource(*args)
+
+	def lock(self, obj):
+		return self.shard_of(obj).lock(obj)
+
+	def retryable(self, err):
+		return any(shard.retryable(err) for shard in self.shards)
@@ -1,3 +1,4 @@
+from sqlite3 import OperationalError
 from aiosqlite import connect
 from .transaction import Transaction
 from .data import DataSource, DataScope
@@ -46,6 +47,10 @@ class SQLiteScope(DataScope):
 	def create_source(self, *args):
 		return SQLiteSource(*args)
 
+	def retryable(self, err):
+		return isinstance(err, OperationalError) \
+			and any(state in str(err) for state in ('locked', 'busy'))
+
 class SQLiteSingleClientScope(SQLiteScope):
 
 	def __init__(self, connection_string):
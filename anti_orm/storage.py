@@ -1,5 +1,8 @@
+from sys import getsizeof
 from weakref import WeakKeyDictionary
 from collections import UserDict
+from operator import attrgetter
+from bisect import bisect_left, bisect_right
 
 class MapAggregator:
 
@@ -15,6 +18,23 @@ class MapAggregator:
 	def mapping(self):
 		return self.entries.items()
 
+	def stats(self, deep = False):
+		return {'maps': {
+			name: entry.stats(deep) for name, entry in self.mapping()
+		}}
+
+def estimate_size(containers, values = ()):
+	size = sum(getsizeof(container) for container in containers)
+	for value in values:
+		size += getsizeof(value)
+		if hasattr(value, '__dict__'):
+			size += getsizeof(value.__dict__)
+	return size
+
+class Bindable:
+
+	__slots__ = ('bound_storage', '__weakref__')
+
 class Storage(MapAggregator):
 
 	values_storages = WeakKeyDictionary()
@@ -25,10 +45,15 @@ class Storage(MapAggregator):
 
 	@classmethod
 	def of(cls, value):
+		if isinstance(value, Bindable):
+			return getattr(value, 'bound_storage', None)
 		return cls.values_storages.get(value)
 
 	def bind(self, value):
-		self.values_storages[value] = self
+		if isinstance(value, Bindable):
+			value.bound_storage = self
+		else:
+			self.values_storages[value] = self
 
 	def cache(self, value):
 		pass
@@ -47,17 +72,30 @@ class Storage(MapAggregator):
 				mapping = setup[0]
 				void = setup[1] if len(setup) > 1 else None
 
+			ordered = isinstance(mapping, Ordered)
+			if ordered:
+				mapping = mapping.mapping
+
 			if isinstance(mapping, DoubleSideMap):
-				self.entries[name] = IdentityMap(mapping, self)
+				self.entries[name] = self.identity_map(mapping)
 			else:
 				hash_fn = mapping if callable(mapping) \
 					else None if mapping \
 					else (lambda value: value)
-				self.entries[name] = IdentityMap(DoubleSideCollectionMap(
+				self.entries[name] = self.identity_map((
+					DoubleSideOrderedCollectionMap if ordered
+						else DoubleSideCollectionMap
+				)(
 					self[id_map_name], hash_fn
-				) if id_map_name else DoubleSideMap(
+				) if id_map_name else DoubleSideOrderedMap(
 					hash_fn, void
-				), self)
+				) if ordered else self.unique_map(hash_fn, void))
+
+	def identity_map(self, mapping):
+		return IdentityMap(mapping, self)
+
+	def unique_map(self, hash_fn, void):
+		return DoubleSideMap(hash_fn, void)
 
 	def add_mapping(self, **maps):
 		self.make_mapping(**{
@@ -80,6 +118,76 @@ class WeakStorage(Storage):
 				mapping.remove(value)
 		return False
 
+class CompositeKey:
+
+	def __init__(self, *attrs, **computed):
+		self.fields = {
+			**{attr: attrgetter(attr) for attr in attrs},
+			**computed
+		}
+
+	def __call__(self, value):
+		return self.pack(field(value) for field in self.fields.values())
+
+	def key(self, criteria):
+		return self.pack(criteria[name] for name in self.fields)
+
+	def covers(self, criteria):
+		return all(name in criteria for name in self.fields)
+
+	@staticmethod
+	def pack(parts):
+		parts = tuple(parts)
+		return parts[0] if len(parts) == 1 else parts
+
+class Ordered:
+
+	def __init__(self, mapping = False):
+		self.mapping = mapping
+
+class KeyOrder:
+
+	def __init__(self):
+		self.keys = []
+
+	def __len__(self):
+		return len(self.keys)
+
+	def add(self, key):
+		position = bisect_left(self.keys, key)
+		if position == len(self.keys) or self.keys[position] != key:
+			self.keys.insert(position, key)
+
+	def discard(self, key):
+		position = bisect_left(self.keys, key)
+		if position < len(self.keys) and self.keys[position] == key:
+			del self.keys[position]
+
+	def range(self, lo = None, hi = None, reverse = False):
+		if reverse:
+			position = len(self.keys) if hi is None \
+				else bisect_left(self.keys, hi)
+			while position > 0:
+				key = self.keys[position - 1]
+				if lo is not None and key < lo:
+					return
+				yield key
+				position = bisect_left(self.keys, key)
+		else:
+			position = 0 if lo is None else bisect_left(self.keys, lo)
+			while position < len(self.keys):
+				key = self.keys[position]
+				if hi is not None and key >= hi:
+					return
+				yield key
+				position = bisect_right(self.keys, key)
+
+	def prefix(self, prefix):
+		for key in self.range(prefix):
+			if key[:len(prefix)] != prefix:
+				return
+			yield key
+
 class DoubleSideMap(UserDict):
 
 	def __init__(self, hash_fn = None, void = None):
@@ -106,6 +214,9 @@ class DoubleSideMap(UserDict):
 	def subkeys(self, main_key):
 		return [main_key] if main_key in self else []
 
+	def size(self, main_key):
+		return 1 if main_key in self else 0
+
 	def natural(self, main_key):
 		return self.get(main_key)
 
@@ -121,9 +232,65 @@ class DoubleSideMap(UserDict):
 	def insert(self, main_key, value):
 		self[self.subkey(main_key, value)] = value
 
+	def hashed_key(self, value):
+		return self.hash(value) if self.hash else self.key_of(value)
+
+	def reindex(self, value):
+		if not isinstance(self.hash, CompositeKey):
+			return
+		key = self.key_of(value)
+		if key in self and key != self.hashed_key(value):
+			del self[key]
+			self.forget(value)
+
+	def forget(self, value):
+		self.reverse.pop(value, None)
+
+	def relink(self, links):
+		pass
+
+	def stats(self, deep = False):
+		stats = {'values': len(self), 'reverse': len(self.reverse)}
+		if deep:
+			stats['bytes'] = estimate_size(self.containers(), self.values())
+		return stats
+
+	def containers(self):
+		return [self.data, self.reverse.data, *self.reverse.data]
+
+	def irange(self, lo = None, hi = None, reverse = False):
+		raise TypeError('Mapping is not ordered')
+
+	def iprefix(self, prefix):
+		raise TypeError('Mapping is not ordered')
+
 	def empty_copy(self):
 		return DoubleSideMap(self.hash, self.void)
 
+class DoubleSideOrderedMap(DoubleSideMap):
+
+	def __init__(self, hash_fn = None, void = None):
+		super().__init__(hash_fn, void)
+		self.order = KeyOrder()
+
+	def __setitem__(self, key, value):
+		if key is not self.void:
+			self.order.add(key)
+		super().__setitem__(key, value)
+
+	def __delitem__(self, key):
+		super().__delitem__(key)
+		self.order.discard(key)
+
+	def irange(self, lo = None, hi = None, reverse = False):
+		return self.order.range(lo, hi, reverse)
+
+	def iprefix(self, prefix):
+		return self.order.prefix(prefix)
+
+	def empty_copy(self):
+		return DoubleSideOrderedMap(self.hash, self.void)
+
 class DoubleSideCollectionMap(DoubleSideMap):
 
 	def __init__(self, unique_map, hash_fn = None):
@@ -151,13 +318,15 @@ class DoubleSideCollectionMap(DoubleSideMap):
 
 	def __iter__(self):
 		for key in self.data:
-			yield from self.data[key]
+			for subkey in self.data[key]:
+				yield (key, subkey)
 
 	def __len__(self):
 		return sum(len(collection) for collection in self.data.values())
 
 	def key_of(self, value):
-		return (super().key_of(value), self.id_map.key_of(value))
+		return self.reverse[value] if value in self.reverse \
+			else (self.generate_key(value), self.id_map.key_of(value))
 
 	def subkey(self, main_key, value):
 		return (main_key, self.id_map.key_of(value))
@@ -166,12 +335,52 @@ class DoubleSideCollectionMap(DoubleSideMap):
 		for subkey in self.data.get(main_key, []):
 			yield (main_key, subkey)
 
+	def size(self, main_key):
+		return len(self.data.get(main_key, ()))
+
 	def natural(self, main_key):
 		return self.data[main_key].values() if main_key in self.data else []
 
+	def hashed_key(self, value):
+		return (self.hash(value), self.id_map.key_of(value)) if self.hash \
+			else self.key_of(value)
+
+	def relink(self, links):
+		for original, local in links:
+			if self.id_map is original:
+				self.id_map = local
+
+	def containers(self):
+		return [*super().containers(), *self.data.values()]
+
 	def empty_copy(self):
 		return DoubleSideCollectionMap(self.id_map, self.hash)
 
+class DoubleSideOrderedCollectionMap(DoubleSideCollectionMap):
+
+	def __init__(self, unique_map, hash_fn = None):
+		super().__init__(unique_map, hash_fn)
+		self.order = KeyOrder()
+
+	def __setitem__(self, key, value):
+		if self.void not in key:
+			self.order.add(key[0])
+		super().__setitem__(key, value)
+
+	def __delitem__(self, key):
+		super().__delitem__(key)
+		if key[0] not in self.data:
+			self.order.discard(key[0])
+
+	def irange(self, lo = None, hi = None, reverse = False):
+		return self.order.range(lo, hi, reverse)
+
+	def iprefix(self, prefix):
+		return self.order.prefix(prefix)
+
+	def empty_copy(self):
+		return DoubleSideOrderedCollectionMap(self.id_map, self.hash)
+
 class DoubleSideMapProxy(DoubleSideMap):
 
 	def __init__(self, original_map):
@@ -187,9 +396,31 @@ class DoubleSideMapProxy(DoubleSideMap):
 	def subkeys(self, main_key):
 		return self.data.subkeys(main_key)
 
+	def size(self, main_key):
+		return self.data.size(main_key)
+
 	def natural(self, main_key):
 		return self.data.natural(main_key)
 
+	def hashed_key(self, value):
+		return self.data.hashed_key(value)
+
+	def forget(self, value):
+		super().forget(value)
+		self.data.forget(value)
+
+	def relink(self, links):
+		self.data.relink(links)
+
+	def stats(self, deep = False):
+		return self.data.stats(deep)
+
+	def irange(self, lo = None, hi = None, reverse = False):
+		return self.data.irange(lo, hi, reverse)
+
+	def iprefix(self, prefix):
+		return self.data.iprefix(prefix)
+
 	def empty_copy(self):
 		return self.data.empty_copy()
 
@@ -201,7 +432,8 @@ class IdentityMap(DoubleSideMapProxy):
 		self.storage = storage
 
 	def __setitem__(self, key, value):
-		super().__setitem__(key, value)
+		if key is not self.void:
+			self.data[key] = value
 		self.storage.bind(value)
 
 	def key_of(self, value):
@@ -210,16 +442,32 @@ class IdentityMap(DoubleSideMapProxy):
 	def taken_count(self, key):
 		return self.taken.get(key, 0)
 
-	def take(self, key):
+	def pin(self, key):
 		self.taken[key] = self.taken_count(key) + 1
+
+	def unpin(self, key):
+		self.taken[key] -= 1
+		if self.taken[key] == 0:
+			del self.taken[key]
+
+	def stats(self, deep = False):
+		stats = {
+			**super().stats(deep),
+			'taken': len(self.taken),
+			'pins': sum(self.taken.values())
+		}
+		if deep:
+			stats['bytes'] += getsizeof(self.taken)
+		return stats
+
+	def take(self, key):
+		self.pin(key)
 		if key in self:
 			self.storage.cache(self[key])
 			return self[key]
 
 	def release(self, key):
-		self.taken[key] -= 1
-		if self.taken[key] == 0:
-			del self.taken[key]
+		self.unpin(key)
 		if key in self:
 			if self.storage.uncache(self[key]):
 				del self[key]
\ No newline at end of file
@@ -0,0 +1,171 @@
+from array import array
+from .storage import (
+	Storage, VoidStorage, WeakStorage,
+	DoubleSideMap, DoubleSideMapProxy, IdentityMap
+)
+
+EMPTY = object()
+
+class CompactStorage(Storage):
+
+	def identity_map(self, mapping):
+		return CompactIdentityMap(mapping, self) \
+			if isinstance(mapping, CompactDoubleSideMap) \
+			else super().identity_map(mapping)
+
+	def unique_map(self, hash_fn, void):
+		return CompactDoubleSideMap(hash_fn, void)
+
+class CompactVoidStorage(CompactStorage, VoidStorage):
+	pass
+
+class CompactWeakStorage(CompactStorage, WeakStorage):
+	pass
+
+class CompactDoubleSideMap(DoubleSideMap):
+
+	def __init__(self, hash_fn = None, void = None):
+		self.hash = hash_fn
+		self.void = void
+		self.slots = {}
+		self.slot_keys = []
+		self.slot_values = []
+		self.pins = array('I')
+		self.free = array('L')
+		self.reverse = {}
+		self.count = 0
+
+	def __repr__(self):
+		return repr(dict(self.items()))
+
+	def __getitem__(self, key):
+		value = self.slot_values[self.slots[key]]
+		if value is EMPTY:
+			raise KeyError(key)
+		return value
+
+	def __setitem__(self, key, value):
+		if key is self.void:
+			return
+		slot = self.allocate(key)
+		previous = self.slot_values[slot]
+		if previous is EMPTY:
+			self.count += 1
+		elif self.reverse.get(previous) == slot:
+			del self.reverse[previous]
+		self.slot_values[slot] = value
+		self.reverse[value] = slot
+
+	def __delitem__(self, key):
+		slot = self.slots[key]
+		value = self.slot_values[slot]
+		if value is EMPTY:
+			raise KeyError(key)
+		self.slot_values[slot] = EMPTY
+		self.count -= 1
+		if self.reverse.get(value) == slot:
+			del self.reverse[value]
+		self.vacate(slot)
+
+	def __contains__(self, key):
+		slot = self.slots.get(key)
+		return slot is not None and self.slot_values[slot] is not EMPTY
+
+	def __iter__(self):
+		for key, slot in [*self.slots.items()]:
+			if self.slot_values[slot] is not EMPTY:
+				yield key
+
+	def __len__(self):
+		return self.count
+
+	def key_of(self, value):
+		slot = self.reverse.get(value)
+		return self.slot_keys[slot] \
+			if slot is not None and self.slot_values[slot] is value \
+			else self.generate_key(value)
+
+	def forget(self, value):
+		slot = self.reverse.get(value)
+		if slot is not None and self.slot_values[slot] is not value:
+			del self.reverse[value]
+
+	def allocate(self, key):
+		slot = self.slots.get(key)
+		if slot is None:
+			if self.free:
+				slot = self.free.pop()
+				self.slot_keys[slot] = key
+			else:
+				slot = len(self.slot_keys)
+				self.slot_keys.append(key)
+				self.slot_values.append(EMPTY)
+				self.pins.append(0)
+			self.slots[key] = slot
+		return slot
+
+	def vacate(self, slot):
+		if self.slot_values[slot] is EMPTY and self.pins[slot] == 0:
+			del self.slots[self.slot_keys[slot]]
+			self.slot_keys[slot] = None
+			self.free.append(slot)
+
+	def stats(self, deep = False):
+		return {
+			**super().stats(deep),
+			'slots': len(self.slot_keys),
+			'free': len(self.free)
+		}
+
+	def containers(self):
+		return [
+			self.slots, self.slot_keys, self.slot_values,
+			self.pins, self.free, self.reverse
+		]
+
+	def pins_of(self, key):
+		slot = self.slots.get(key)
+		return 0 if slot is None else self.pins[slot]
+
+	def pinned(self):
+		return {
+			key: self.pins[slot]
+				for key, slot in self.slots.items() if self.pins[slot]
+		}
+
+	def pin(self, key):
+		self.pins[self.allocate(key)] += 1
+
+	def unpin(self, key):
+		slot = self.slots[key]
+		self.pins[slot] -= 1
+		self.vacate(slot)
+
+	def empty_copy(self):
+		return CompactDoubleSideMap(self.hash, self.void)
+
+class CompactIdentityMap(IdentityMap):
+
+	def __init__(self, original_map, storage):
+		DoubleSideMapProxy.__init__(self, original_map)
+		self.storage = storage
+
+	@property
+	def taken(self):
+		return self.data.pinned()
+
+	def stats(self, deep = False):
+		return {
+			**self.data.stats(deep),
+			'taken': sum(1 for pins in self.data.pins if pins),
+			'pins': sum(self.data.pins)
+		}
+
+	def taken_count(self, key):
+		return self.data.pins_of(key)
+
+	def pin(self, key):
+		self.data.pin(key)
+
+	def unpin(self, key):
+		self.data.unpin(key)
@@ -1,9 +1,25 @@
 from asyncio import Lock, gather
 from weakref import WeakValueDictionary
-from .storage import MapAggregator
+from .storage import MapAggregator, estimate_size
 
 VOID = object()
 
+def run_sync(awaitable):
+	try:
+		awaitable.send(None)
+	except StopIteration as result:
+		return result.value
+	awaitable.close()
+	raise RuntimeError('Awaitable suspended outside of the event loop')
+
+def ensure_free(*locks):
+	if any(lock.locked() for lock in locks):
+		raise RuntimeError('Lock is held, acquiring it synchronously would block')
+
+def acquire_now(lock):
+	ensure_free(lock)
+	run_sync(Lock.acquire(lock))
+
 class LockMapAggregator(MapAggregator):
 
 	def __call__(self, nkw__value = VOID, **keys):
@@ -60,6 +76,18 @@ class LockMap:
 	def create_lock(self, key):
 		return CustomLock()
 
+	def stats(self, deep = False):
+		locks = [*self.locks.values()]
+		stats = {
+			'locks': len(locks),
+			'held': sum(1 for lock in locks if lock.held())
+		}
+		if deep:
+			stats['bytes'] = estimate_size(
+				[getattr(self.locks, 'data', self.locks), *locks]
+			)
+		return stats
+
 class IdentityMapLock(LockMap):
 
 	def create_lock(self, key):
@@ -80,14 +108,30 @@ class IdentityMapLockClient(LockMap):
 
 class CustomLock(Lock):
 
+	def __enter__(self):
+		self.acquire_sync()
+
+	def __exit__(self, *_):
+		self.release()
+
 	async def ensure_acquire(self):
 		if not self.locked():
 			await self.acquire()
 
+	def acquire_sync(self):
+		acquire_now(self)
+
+	def ensure_acquire_sync(self):
+		if not self.locked():
+			self.acquire_sync()
+
 	def ensure_release(self):
 		if self.locked():
 			self.release()
 
+	def held(self):
+		return self.locked()
+
 class GlobalLock(CustomLock):
 
 	def __init__(self, mapping, key):
@@ -102,6 +146,14 @@ class GlobalLock(CustomLock):
 	async def ensure_acquire(self):
 		await self.acquire()
 
+	def acquire_sync(self):
+		ensure_free(self)
+		self.map.take(self.key)
+		acquire_now(self)
+
+	def ensure_acquire_sync(self):
+		self.acquire_sync()
+
 	def release(self):
 		super().release()
 		self.map.release(self.key)
@@ -124,6 +176,16 @@ class LockClient(CustomLock):
 		if self.context_locked:
 			self.release()
 
+	def __enter__(self):
+		self.context_locked = not self.local_lock.locked()
+		self.ensure_acquire_sync()
+		acquire_now(self)
+
+	def __exit__(self, *_):
+		super().release()
+		if self.context_locked:
+			self.release()
+
 	async def acquire(self):
 		await super().acquire()
 		await self.local_lock.acquire()
@@ -134,6 +196,15 @@ class LockClient(CustomLock):
 		if not self.local_lock.locked():
 			await self.acquire()
 
+	def acquire_sync(self):
+		ensure_free(self, self.local_lock, self.global_lock)
+		acquire_now(self.local_lock)
+		self.global_lock.acquire_sync()
+
+	def ensure_acquire_sync(self):
+		if not self.local_lock.locked():
+			self.acquire_sync()
+
 	def release(self):
 		self.local_lock.release()
 		self.global_lock.release()
@@ -142,6 +213,9 @@ class LockClient(CustomLock):
 		if self.local_lock.locked():
 			self.release()
 
+	def held(self):
+		return self.local_lock.locked()
+
 class CompositeLock(CustomLock):
 
 	def __init__(self, lock_map_aggregator, value = VOID, keys = {}):
@@ -161,11 +235,38 @@ class CompositeLock(CustomLock):
 		self.locks.clear()
 		super().release()
 
+	def __enter__(self):
+		acquire_now(self)
+		self.update_locks()
+		entered = []
+		try:
+			for lock in self.locks.values():
+				lock.__enter__()
+				entered.append(lock)
+		except Exception:
+			for lock in entered:
+				lock.__exit__(None, None, None)
+			self.locks.clear()
+			super().release()
+			raise
+
+	def __exit__(self, *exc):
+		for lock in self.locks.values():
+			lock.__exit__(*exc)
+		self.locks.clear()
+		super().release()
+
 	async def acquire(self):
 		await super().acquire()
 		self.update_locks()
 		await gather(*(lock.ensure_acquire() for lock in self.locks.values()))
 
+	def acquire_sync(self):
+		acquire_now(self)
+		self.update_locks()
+		for lock in self.locks.values():
+			lock.ensure_acquire_sync()
+
 	def release(self):
 		for lock in self.locks.values():
 			lock.release()
@@ -1,13 +1,23 @@
 from asyncio import gather
-from .storage import MapAggregator, DoubleSideMapProxy
+from operator import attrgetter
+from itertools import islice
+from heapq import merge
+from .storage import (
+	MapAggregator, DoubleSideMapProxy, CompositeKey, estimate_size
+)
+
+VOID = object()
 
 class StorageTransaction(MapAggregator):
 
 	def __init__(self, storage, restore = None):
 		self.maps = {
-			name: IdentityMapTransaction(mapping)
+			name: self.map_transaction(name, mapping)
 				for name, mapping in storage.mapping()
 		}
+		links = [(storage[name], mapping) for name, mapping in self.maps.items()]
+		for mapping in self.maps.values():
+			mapping.relink(links)
 		super().__init__(**{
 			name: StorageEntry(self, mapping)
 				for name, mapping in self.maps.items()
@@ -16,6 +26,8 @@ class StorageTransaction(MapAggregator):
 		self.existed = {}
 		self.restored = set()
 		self.restore = restore
+		self.restore_batch = None
+		self.restore_sync = None
 
 	def __contains__(self, value):
 		for mapping in self.maps.values():
@@ -37,7 +49,39 @@ class StorageTransaction(MapAggregator):
 			return value
 
 		if value is not None:
-			await self.restore(value)
+			await self.restore_values([value])
+		return value
+
+	async def restore_all(self, values):
+		values = [self.take(value) for value in values]
+		pending = [*dict.fromkeys(
+			value for value in values
+				if value is not None and value not in self.restored
+		)]
+		if self.restore and pending:
+			await self.restore_values(pending)
+		return values
+
+	async def restore_values(self, values):
+		if self.restore_batch:
+			await self.restore_batch(values)
+		elif len(values) == 1:
+			await self.restore(values[0])
+		else:
+			await gather(*(self.restore(value) for value in values))
+		self.restored.update(values)
+
+	def get_sync(self, value):
+		value = self.take(value)
+		if not self.restore or value in self.restored:
+			return value
+
+		if value is not None:
+			if not self.restore_sync:
+				raise TypeError(
+					f'{type(self).__name__}.restore can only run asynchronously'
+				)
+			self.restore_sync(value)
 			self.restored.add(value)
 		return value
 
@@ -47,10 +91,54 @@ class StorageTransaction(MapAggregator):
 				return mapping[mapping.key_of(value)]
 		return self.refresh(value)
 
-	def all(self):
-		for mapping in self.maps.values():
-			mapping.take_all()
-		return iter(self)
+	def all(self, release = False, where = None):
+		maps = [*self.maps.values()]
+		for position, mapping in enumerate(maps):
+			for key in mapping.known_keys():
+				fresh = key not in mapping.taken
+				value = mapping.peek(key) if fresh else mapping.get(key)
+				if value is None or any(
+					earlier.covers(value) for earlier in maps[:position]
+				):
+					continue
+
+				if fresh:
+					value = self.take(value)
+				if where and not where(value):
+					if fresh:
+						self.release_untouched(value)
+					continue
+				try:
+					yield value
+				finally:
+					if release and fresh:
+						self.release_untouched(value)
+
+	def map_transaction(self, name, mapping):
+		return IdentityMapTransaction(mapping)
+
+	def find(self, **criteria):
+		fields = {}
+		plan = None
+		for map_name, mapping in self.maps.items():
+			if isinstance(mapping.hash, CompositeKey):
+				fields.update(mapping.hash.fields)
+				if mapping.hash.covers(criteria):
+					key = mapping.hash.key(criteria)
+					size = mapping.global_map.size(key)
+					if not plan or size < plan[0]:
+						plan = (size, map_name, key)
+
+		def matches(value):
+			return all(
+				(fields.get(name) or attrgetter(name))(value) == expected
+					for name, expected in criteria.items()
+			)
+
+		return [*(
+			self[plan[1]].scan([plan[2]], matches) if plan
+				else self.all(where = matches)
+		)]
 
 	def release(self, value):
 		for mapping in self.maps.values():
@@ -58,6 +146,13 @@ class StorageTransaction(MapAggregator):
 				mapping.release(mapping.key_of(value))
 		del self.existed[value]
 
+	def release_untouched(self, value):
+		if self.existed.get(value) is value and not any(
+			mapping.key_of(value) in mapping.updated
+				for mapping in self.maps.values() if mapping.has(value)
+		):
+			self.release(value)
+
 	def take_writable(self, value):
 		value = self.refresh(value)
 		if value is None:
@@ -96,6 +191,7 @@ class StorageTransaction(MapAggregator):
 
 		for map_name, mapping in self.maps.items():
 			if map_name not in keys:
+				mapping.reindex(value)
 				mapping.add(value)
 
 		self.restored.add(value)
@@ -134,6 +230,19 @@ class StorageTransaction(MapAggregator):
 	def track_delete(self, value):
 		self.existed.pop(value, None)
 
+	def stats(self, deep = False):
+		stats = {
+			'existed': len(self.existed),
+			'restored': len(self.restored),
+			'maps': {
+				name: mapping.stats(deep) for name, mapping in self.maps.items()
+			}
+		}
+		if deep:
+			stats['bytes'] = estimate_size([self.existed, self.restored]) \
+				+ sum(map_stats['bytes'] for map_stats in stats['maps'].values())
+		return stats
+
 	def flush(self):
 		for mapping in self.maps.values():
 			mapping.flush()
@@ -162,16 +271,62 @@ class StorageEntry:
 
 	async def __call__(self, key):
 		value = self[key]
-		await gather(*(
-			self.storage(self.map[subkey])
-				for subkey in self.map.subkeys(key)
-				if subkey in self.map
-		))
+		await self.storage.restore_all(self.values_of([key]))
+		return value
+
+	async def many(self, keys):
+		keys = [*keys]
+		await self.storage.restore_all(self.load(keys))
+		return [self.map.natural(key) for key in keys]
+
+	def get_sync(self, key):
+		value = self[key]
+		for subkey in [*self.map.subkeys(key)]:
+			if subkey in self.map:
+				self.storage.get_sync(self.map[subkey])
 		return value
 
 	def key_of(self, value):
 		return self.map.key_of(value)
 
+	def range(self, lo = None, hi = None, limit = None, reverse = False):
+		return islice(self.scan(self.map.irange(lo, hi, reverse)), limit)
+
+	def prefix(self, prefix, limit = None):
+		return islice(self.scan(self.map.iprefix(prefix)), limit)
+
+	def ordered(self, limit = None, reverse = False):
+		return self.range(limit = limit, reverse = reverse)
+
+	def scan(self, keys, where = None):
+		for key in keys:
+			for subkey in self.map.known_subkeys(key):
+				fresh = subkey not in self.map.taken
+				if fresh:
+					self.map.take(subkey)
+					if subkey in self.map:
+						self.storage.refresh(self.map[subkey])
+				if subkey not in self.map:
+					continue
+				value = self.map[subkey]
+				if where and not where(value):
+					if fresh:
+						self.storage.release_untouched(value)
+					continue
+				yield value
+
+	def load(self, keys):
+		for key in keys:
+			self[key]
+		return self.values_of(keys)
+
+	def values_of(self, keys):
+		return [
+			self.map[subkey]
+				for key in keys for subkey in self.map.subkeys(key)
+				if subkey in self.map
+		]
+
 	def untaken(self, key):
 		for subkey in self.map.subkeys(key):
 			if subkey not in self.map:
@@ -202,13 +357,50 @@ class IdentityMapTransaction(DoubleSideMapProxy):
 	def subkeys(self, main_key):
 		return self.global_map.subkeys(main_key)
 
+	def known_subkeys(self, main_key):
+		subkeys = [*self.subkeys(main_key)]
+		return subkeys + [
+			subkey for subkey in self.data.subkeys(main_key)
+				if not self.exists(subkey)
+		]
+
+	def irange(self, lo = None, hi = None, reverse = False):
+		return self.merge_keys(
+			self.global_map.irange(lo, hi, reverse),
+			self.data.irange(lo, hi, reverse),
+			reverse
+		)
+
+	def iprefix(self, prefix):
+		return self.merge_keys(
+			self.global_map.iprefix(prefix), self.data.iprefix(prefix)
+		)
+
+	@staticmethod
+	def merge_keys(global_keys, local_keys, reverse = False):
+		last = VOID
+		for key in merge(global_keys, local_keys, reverse = reverse):
+			if last is VOID or key != last:
+				yield key
+			last = key
+
+	def known_keys(self):
+		yield from [*self.global_map]
+		yield from [key for key in self.data if not self.exists(key)]
+
+	def covers(self, value):
+		return self.has(value) or self.global_map.has(value)
+
 	def exists(self, key):
 		return key in self.global_map
 
+	def peek(self, key):
+		return self.global_map.get(key)
+
 	def take(self, key):
 		if self.exists(key):
 			self.register(key)
-			super().__setitem__(key, self.global_map[key])
+			super().__setitem__(key, self.peek(key))
 
 	def take_all(self):
 		for key in self.global_map:
@@ -218,7 +410,7 @@ class IdentityMapTransaction(DoubleSideMapProxy):
 	def push(self, key):
 		if key in self:
 			self.global_map[key] = self[key]
-		else:
+		elif self.exists(key):
 			del self.global_map[key]
 
 	def register(self, key):
@@ -233,10 +425,24 @@ class IdentityMapTransaction(DoubleSideMapProxy):
 		if key is not self.void:
 			self.updated.add(key)
 
+	def stats(self, deep = False):
+		stats = {
+			'values': len(self),
+			'taken': len(self.taken),
+			'updated': len(self.updated)
+		}
+		if deep:
+			stats['bytes'] = estimate_size([
+				*self.data.containers(), self.taken, self.updated,
+				self.reverse.data, *self.reverse.data
+			])
+		return stats
+
 	def release(self, key):
 		self.global_map.release(key)
 		self.taken.remove(key)
 		self.pop(key, None)
+		self.make_readonly(key)
 
 	def flush(self):
 		for key in self.updated:
@@ -0,0 +1,99 @@
+from time import perf_counter
+from bisect import bisect_left
+
+class Span:
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *_):
+		pass
+
+class Tracer:
+
+	def span(self, phase, scope = None):
+		return NO_SPAN
+
+class TimedSpan(Span):
+
+	def __init__(self, tracer, phase, scope):
+		self.tracer = tracer
+		self.phase = phase
+		self.scope = scope
+		self.started = None
+
+	def __enter__(self):
+		self.tracer.start(self.phase, self.scope)
+		self.started = perf_counter()
+		return self
+
+	def __exit__(self, err_type, *_):
+		self.tracer.end(
+			self.phase, self.scope, perf_counter() - self.started, err_type
+		)
+
+class TimingTracer(Tracer):
+
+	def span(self, phase, scope = None):
+		return TimedSpan(self, phase, scope)
+
+	def start(self, phase, scope):
+		pass
+
+	def end(self, phase, scope, duration, err_type = None):
+		pass
+
+class Histogram:
+
+	bounds = [1e-6 * 2 ** power for power in range(28)]
+
+	def __init__(self):
+		self.counts = [0] * (len(self.bounds) + 1)
+		self.count = 0
+		self.total = 0
+		self.max = 0
+
+	def add(self, duration):
+		self.counts[bisect_left(self.bounds, duration)] += 1
+		self.count += 1
+		self.total += duration
+		self.max = max(self.max, duration)
+
+	def percentile(self, fraction):
+		target = fraction * self.count
+		seen = 0
+		for position, count in enumerate(self.counts):
+			seen += count
+			if count and seen >= target:
+				return min(self.bounds[position], self.max) \
+					if position < len(self.bounds) else self.max
+		return 0
+
+	def summary(self):
+		return {
+			'count': self.count,
+			'mean': self.total / self.count if self.count else 0,
+			'p50': self.percentile(0.5),
+			'p95': self.percentile(0.95),
+			'p99': self.percentile(0.99),
+			'max': self.max
+		}
+
+class HistogramTracer(TimingTracer):
+
+	def __init__(self):
+		self.histograms = {}
+
+	def end(self, phase, scope, duration, err_type = None):
+		if (phase, scope) not in self.histograms:
+			self.histograms[(phase, scope)] = Histogram()
+		self.histograms[(phase, scope)].add(duration)
+
+	def summary(self):
+		return {
+			key: histogram.summary()
+				for key, histogram in self.histograms.items()
+		}
+
+NO_SPAN = Span()
+NO_TRACER = Tracer()
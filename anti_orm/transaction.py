@@ -1,4 +1,12 @@
 from asyncio import gather
+from .tracing import NO_TRACER
+
+def require_sync(obj, base, *methods):
+	for method in methods:
+		if getattr(type(obj), method) is not getattr(base, method):
+			raise TypeError(
+				f'{type(obj).__name__}.{method} can only run asynchronously'
+			)
 
 class BaseTransaction:
 
@@ -10,6 +18,9 @@ class BaseTransaction:
 
 class Transaction(BaseTransaction):
 
+	tracer = NO_TRACER
+	scope = None
+
 	def __init__(self):
 		self.sources = []
 
@@ -17,25 +28,50 @@ class Transaction(BaseTransaction):
 		if source not in self.sources:
 			self.sources.append(source)
 
+	def trace(self, tracer, scope = None):
+		self.tracer = tracer
+		self.scope = scope
+
 	async def commit(self):
 		try:
-			await self.flush()
+			with self.tracer.span('flush', self.scope):
+				await self.flush()
 		except Exception:
 			await self.rollback()
 			raise
 		try:
-			await self.do_commit()
+			with self.tracer.span('commit', self.scope):
+				await self.do_commit()
 		finally:
-			await self.release()
+			with self.tracer.span('release', self.scope):
+				await self.release()
+
+	def ensure_sync(self):
+		if type(self).commit_sync is Transaction.commit_sync:
+			require_sync(self, Transaction, 'flush', 'do_commit', 'release')
+		if type(self).rollback_sync is Transaction.rollback_sync:
+			require_sync(self, Transaction, 'do_rollback', 'release')
+
+	def commit_sync(self):
+		require_sync(self, Transaction, 'flush', 'do_commit', 'release')
+		for source in self.sources:
+			source.flush_sync()
+		self.release_sync()
 
 	async def do_commit(self):
 		pass
 
 	async def rollback(self):
 		try:
-			await self.do_rollback()
+			with self.tracer.span('rollback', self.scope):
+				await self.do_rollback()
 		finally:
-			await self.release()
+			with self.tracer.span('release', self.scope):
+				await self.release()
+
+	def rollback_sync(self):
+		require_sync(self, Transaction, 'do_rollback', 'release')
+		self.release_sync()
 
 	async def do_rollback(self):
 		pass
@@ -44,4 +80,8 @@ class Transaction(BaseTransaction):
 		await gather(*(source.flush() for source in self.sources))
 
 	async def release(self):
-		await gather(*(source.release() for source in self.sources))
\ No newline at end of file
+		await gather(*(source.release() for source in self.sources))
+
+	def release_sync(self):
+		for source in self.sources:
+			source.release_sync()
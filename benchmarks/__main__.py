@@ -0,0 +1,69 @@
+from sys import stdout, stderr, version
+from json import dump
+from platform import platform
+from datetime import datetime, timezone
+from argparse import ArgumentParser
+from importlib.metadata import version as package_version, PackageNotFoundError
+from . import storage, locks, pool, memory_scope, sqlite, memory
+from .common import measure
+
+SUITES = {
+	'storage': storage,
+	'locks': locks,
+	'pool': pool,
+	'memory_scope': memory_scope,
+	'sqlite': sqlite
+}
+
+def installed_version():
+	try:
+		return package_version('Anti ORM')
+	except PackageNotFoundError:
+		return None
+
+def main():
+	parser = ArgumentParser(prog = 'python -m benchmarks')
+	parser.add_argument('--sizes', type = int, nargs = '+',
+		default = [1000, 10000, 100000])
+	parser.add_argument('--maps', type = int, nargs = '+', default = [1, 4])
+	parser.add_argument('--concurrency', type = int, nargs = '+',
+		default = [1, 16, 64])
+	parser.add_argument('--repeat', type = int, default = 5)
+	parser.add_argument('--suite', nargs = '+',
+		choices = [*SUITES, 'memory'], default = [*SUITES, 'memory'])
+	parser.add_argument('--label')
+	parser.add_argument('--output')
+	args = parser.parse_args()
+
+	results = []
+	for name in args.suite:
+		if name == 'memory':
+			continue
+		for benchmark, params, prepare in SUITES[name].cases(
+			args.sizes, args.maps, args.concurrency
+		):
+			results.append(measure(benchmark, params, prepare, args.repeat))
+			print(
+				f'{benchmark} {params}:'
+				f" {results[-1]['median_per_op'] * 1e6:.3f} us/op",
+				file = stderr
+			)
+
+	report = {
+		'label': args.label,
+		'version': installed_version(),
+		'python': version,
+		'platform': platform(),
+		'time': datetime.now(timezone.utc).isoformat(),
+		'arguments': vars(args),
+		'results': results,
+		'memory': memory.run(args.sizes) if 'memory' in args.suite else []
+	}
+	if args.output:
+		with open(args.output, 'w') as output:
+			dump(report, output, indent = '\t')
+	else:
+		dump(report, stdout, indent = '\t')
+
+if __name__ == '__main__':
+	main()
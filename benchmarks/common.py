@@ -0,0 +1,61 @@
+from time import perf_counter
+from asyncio import run
+from inspect import isawaitable
+from statistics import median
+from anti_orm import Bindable
+from anti_orm.storage_transaction import StorageTransaction
+
+class Row:
+
+	def __init__(self, number):
+		self.number = number
+
+class BindableRow(Bindable, Row):
+	pass
+
+def make_rows(size, row_class = Row):
+	return [row_class(number) for number in range(size)]
+
+def populate(storage, rows, maps = 1, hold = True):
+	storage.make_mapping(id = True, **{
+		f'index_{position}': (lambda row, position = position:
+			(row.number, position))
+				for position in range(1, maps)
+	})
+	transaction = StorageTransaction(storage)
+	for number, row in enumerate(rows):
+		transaction.save(row, id = number)
+	transaction.flush()
+	if not hold:
+		transaction.finish()
+	# An open holder keeps rows pinned, so void and weak policies do not
+	# evict them before the measurement starts
+	assert len(storage.id) == len(rows), 'populated storage is empty'
+	return rows
+
+async def timed(prepare):
+	action = prepare()
+	if isawaitable(action):
+		action = await action
+	try:
+		start = perf_counter()
+		result = action()
+		if isawaitable(result):
+			await result
+		return perf_counter() - start
+	finally:
+		cleanup = getattr(action, 'cleanup', None)
+		if cleanup:
+			cleanup()
+
+def measure(name, params, prepare, repeat = 5):
+	timings = [run(timed(prepare)) for _ in range(repeat)]
+	ops = params.get('ops', 1)
+	return {
+		'benchmark': name,
+		'params': params,
+		'timings': timings,
+		'best': min(timings),
+		'median': median(timings),
+		'median_per_op': median(timings) / ops
+	}
@@ -0,0 +1,24 @@
+from sys import argv
+from json import load
+
+def key(result):
+	return (result['benchmark'], tuple(sorted(result['params'].items())))
+
+def compare(baseline, current, threshold = 0.1):
+	previous = {key(result): result for result in baseline['results']}
+	for result in current['results']:
+		if key(result) in previous:
+			ratio = result['median_per_op'] \
+				/ previous[key(result)]['median_per_op']
+			yield result, ratio, ratio > 1 + threshold
+
+if __name__ == '__main__':
+	with open(argv[1]) as baseline, open(argv[2]) as current:
+		rows = [*compare(load(baseline), load(current))]
+	for result, ratio, regressed in rows:
+		print(
+			f"{'REGRESSED' if regressed else 'ok':>9} {ratio:>6.2f}x"
+			f" {result['benchmark']} {result['params']}"
+		)
+	if any(regressed for _, _, regressed in rows):
+		exit(1)
@@ -0,0 +1,43 @@
+from asyncio import gather
+from anti_orm import Storage
+from anti_orm.storage_lock import StorageLock, StorageLockClient
+from .common import make_rows, populate
+
+def cases(sizes, maps, concurrency):
+	for size in sizes:
+		for map_count in maps:
+			for workers in concurrency:
+				for contended in (False, True):
+					params = {
+						'size': size,
+						'maps': map_count,
+						'concurrency': workers,
+						'contended': contended,
+						'ops': size if contended else size - size % workers
+					}
+					yield 'composite_lock.acquire', params, \
+						lambda size = size, map_count = map_count, \
+							workers = workers, contended = contended: \
+							acquire(size, map_count, workers, contended)
+
+def acquire(size, maps, workers, contended):
+	storage = Storage()
+	rows = populate(storage, make_rows(size), maps)
+	storage_lock = StorageLock(storage)
+	chunk = size // workers
+	batches = [
+		rows[position::workers] if contended
+			else rows[position * chunk:(position + 1) * chunk]
+				for position in range(workers)
+	]
+
+	async def worker(batch):
+		client = StorageLockClient(storage_lock)
+		for row in batch:
+			async with client(row):
+				pass
+		client.release_all()
+
+	async def action():
+		await gather(*(worker(batch) for batch in batches))
+	return action
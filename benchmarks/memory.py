@@ -0,0 +1,43 @@
+from sys import argv
+from gc import collect
+from tracemalloc import start, stop, take_snapshot
+from anti_orm import Storage, CompactStorage
+from .common import Row, BindableRow, make_rows, populate
+
+def measure(storage_class, row_class, size):
+	rows = make_rows(size, row_class)
+	collect()
+	start()
+	before = take_snapshot()
+
+	storage = storage_class()
+	populate(storage, rows, 2, hold = False)
+	for number in range(0, size, 2):
+		storage.id.take(number)
+
+	collect()
+	after = take_snapshot()
+	stop()
+	total = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+	return total / size
+
+def run(sizes = (1000, 10000, 100000)):
+	results = []
+	for size in sizes:
+		for storage_class in (Storage, CompactStorage):
+			for row_class in (Row, BindableRow):
+				results.append({
+					'storage': storage_class.__name__,
+					'rows': row_class.__name__,
+					'size': size,
+					'bytes_per_entry': measure(storage_class, row_class, size)
+				})
+	return results
+
+if __name__ == '__main__':
+	sizes = [int(size) for size in argv[1:]] or (1000, 10000, 100000)
+	for result in run(sizes):
+		print(
+			f"{result['storage']:>16} {result['rows']:>12} {result['size']:>9}"
+			f" {result['bytes_per_entry']:>10.1f} B/entry"
+		)
@@ -0,0 +1,33 @@
+from asyncio import gather
+from itertools import count
+from anti_orm import TransactionPool, MemoryScope
+from .common import Row
+
+COMMITS = 256
+
+def cases(sizes, maps, concurrency):
+	for workers in concurrency:
+		for batch in (1, 100):
+			params = {
+				'concurrency': workers,
+				'batch': batch,
+				'ops': COMMITS - COMMITS % workers
+			}
+			yield 'memory_transaction.commit', params, \
+				lambda workers = workers, batch = batch: commit(workers, batch)
+
+def commit(workers, batch):
+	scope = MemoryScope()
+	commits = COMMITS - COMMITS % workers
+	numbers = count()
+
+	async def worker(position):
+		for _ in range(position, commits, workers):
+			async with TransactionPool(scope) as (source,):
+				for _ in range(batch):
+					number = next(numbers)
+					source.storage.save(Row(number), id = number)
+
+	async def action():
+		await gather(*(worker(position) for position in range(workers)))
+	return action
@@ -0,0 +1,79 @@
+from asyncio import gather
+from anti_orm import (
+	TransactionPool, DataScope, Storage, WeakStorage, HistogramTracer
+)
+from .common import make_rows, populate
+
+POOLS = 1000
+
+def cases(sizes, maps, concurrency):
+	for storage_class in (Storage, WeakStorage):
+		for size in sizes:
+			for workers in concurrency:
+				for writing in (False, True):
+					for traced in (False, True):
+						params = {
+							'storage': storage_class.__name__,
+							'size': size,
+							'concurrency': workers,
+							'write': writing,
+							'traced': traced,
+							'ops': POOLS - POOLS % workers
+						}
+						yield 'transaction_pool.cycle', params, \
+							lambda storage_class = storage_class, size = size, \
+								workers = workers, writing = writing, \
+								traced = traced: \
+								cycle(storage_class, size, workers, writing, traced)
+
+			for writing in (False, True):
+				params = {
+					'storage': storage_class.__name__,
+					'size': size,
+					'write': writing,
+					'ops': POOLS
+				}
+				yield 'transaction_pool.cycle_sync', params, \
+					lambda storage_class = storage_class, size = size, \
+						writing = writing: \
+						cycle_sync(storage_class, size, writing)
+
+def scoped(storage_class, size):
+	class Scope(DataScope):
+
+		def __init__(self):
+			self.storage = storage_class()
+			super().__init__()
+
+	scope = Scope()
+	return scope, populate(scope.storage, make_rows(size))
+
+def cycle_sync(storage_class, size, writing):
+	scope, rows = scoped(storage_class, size)
+	step = max(size // POOLS, 1)
+
+	def action():
+		for number in range(POOLS):
+			row = rows[number * step % size]
+			with TransactionPool(
+				scope, write = {row} if writing else set()
+			) as (source,):
+				source.storage.id.get_sync(row.number)
+	return action
+
+def cycle(storage_class, size, workers, writing, traced = False):
+	scope, rows = scoped(storage_class, size)
+	step = max(size // POOLS, 1)
+	tracer = HistogramTracer() if traced else None
+
+	async def worker(position):
+		for number in range(position, POOLS - POOLS % workers, workers):
+			row = rows[number * step % size]
+			async with TransactionPool(
+				scope, write = {row} if writing else set(), tracer = tracer
+			) as (source,):
+				await source.storage.id(row.number)
+
+	async def action():
+		await gather(*(worker(position) for position in range(workers)))
+	return action
@@ -0,0 +1,56 @@
+from asyncio import gather
+from os import path
+from tempfile import TemporaryDirectory
+from anti_orm import TransactionPool
+
+try:
+	from aiosqlite import connect
+	from anti_orm.sqlite import SQLiteScope
+except ImportError:
+	connect = None
+
+COMMITS = 256
+
+def cases(sizes, maps, concurrency):
+	if not connect:
+		return
+	for workers in concurrency:
+		for batch in (1, 100):
+			params = {
+				'concurrency': workers,
+				'batch': batch,
+				'ops': COMMITS - COMMITS % workers
+			}
+			yield 'sqlite_transaction.commit', params, \
+				lambda workers = workers, batch = batch: commit(workers, batch)
+			yield 'sqlite_transaction.run', params, \
+				lambda workers = workers, batch = batch: \
+					commit(workers, batch, retry = True)
+
+async def commit(workers, batch, retry = False):
+	directory = TemporaryDirectory()
+	database = path.join(directory.name, 'bench.db')
+	async with connect(database) as connection:
+		await connection.execute('create table rows (number integer)')
+		await connection.commit()
+	scope = SQLiteScope(database)
+	commits = COMMITS - COMMITS % workers
+
+	async def insert(source):
+		await source.db.executemany(
+			'insert into rows values (?)',
+			[(number,) for number in range(batch)]
+		)
+
+	async def worker(position):
+		for _ in range(position, commits, workers):
+			if retry:
+				await TransactionPool(scope).run(insert)
+			else:
+				async with TransactionPool(scope) as (source,):
+					await insert(source)
+
+	async def action():
+		await gather(*(worker(position) for position in range(workers)))
+	action.cleanup = directory.cleanup
+	return action
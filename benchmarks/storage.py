@@ -0,0 +1,100 @@
+from anti_orm import (
+	Storage, VoidStorage, WeakStorage,
+	CompactStorage, CompactVoidStorage, CompactWeakStorage
+)
+from anti_orm import DataSource, Transaction
+from anti_orm.storage_transaction import StorageTransaction
+from .common import make_rows, populate
+
+STORAGES = (
+	Storage, VoidStorage, WeakStorage,
+	CompactStorage, CompactVoidStorage, CompactWeakStorage
+)
+
+def cases(sizes, maps, concurrency):
+	for storage_class in STORAGES:
+		for size in sizes:
+			for map_count in maps:
+				params = {
+					'storage': storage_class.__name__,
+					'size': size,
+					'maps': map_count,
+					'ops': size
+				}
+				yield 'storage_transaction.take', params, \
+					lambda storage_class = storage_class, size = size, \
+						map_count = map_count: \
+						transaction_take(storage_class, size, map_count)
+				yield 'storage_entry.getitem', params, \
+					lambda storage_class = storage_class, size = size, \
+						map_count = map_count: \
+						entry_lookup(storage_class, size, map_count)
+				yield 'storage_entry.call', params, \
+					lambda storage_class = storage_class, size = size, \
+						map_count = map_count: \
+						entry_call(storage_class, size, map_count)
+				yield 'storage_entry.get_sync', params, \
+					lambda storage_class = storage_class, size = size, \
+						map_count = map_count: \
+						entry_get_sync(storage_class, size, map_count)
+				yield 'identity_map.take_release', params, \
+					lambda storage_class = storage_class, size = size, \
+						map_count = map_count: \
+						take_release(storage_class, size, map_count)
+
+def transaction_take(storage_class, size, maps):
+	storage = storage_class()
+	rows = populate(storage, make_rows(size), maps)
+
+	def action():
+		transaction = StorageTransaction(storage)
+		for row in rows:
+			transaction.take(row)
+		transaction.finish()
+	return action
+
+def entry_lookup(storage_class, size, maps):
+	storage = storage_class()
+	populate(storage, make_rows(size), maps)
+
+	def action():
+		transaction = StorageTransaction(storage)
+		for number in range(size):
+			transaction.id[number]
+		transaction.finish()
+	return action
+
+def entry_call(storage_class, size, maps):
+	storage = storage_class()
+	populate(storage, make_rows(size), maps)
+
+	async def action():
+		transaction = StorageTransaction(storage)
+		DataSource(Transaction(), transaction, None)
+		for number in range(size):
+			await transaction.id(number)
+		transaction.finish()
+	return action
+
+def entry_get_sync(storage_class, size, maps):
+	storage = storage_class()
+	populate(storage, make_rows(size), maps)
+
+	def action():
+		transaction = StorageTransaction(storage)
+		DataSource(Transaction(), transaction, None)
+		for number in range(size):
+			transaction.id.get_sync(number)
+		transaction.finish()
+	return action
+
+def take_release(storage_class, size, maps):
+	storage = storage_class()
+	populate(storage, make_rows(size), maps)
+	mapping = storage.id
+
+	def action():
+		for number in range(size):
+			mapping.take(number)
+			mapping.release(number)
+	return action
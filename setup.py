@@ -2,7 +2,7 @@ from setuptools import setup, find_packages
 
 setup(
 	name = 'Anti ORM',
-	packages = find_packages(),
+	packages = find_packages(exclude = ['benchmarks', 'benchmarks.*']),
 	version = '0.1',
 	description =
 		'Database-agnostic data manipulation mechanisms'